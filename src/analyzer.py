@@ -1,14 +1,14 @@
 """Analysis engine for detecting price changes and trends"""
 
-from datetime import datetime, timedelta
-from typing import List, Dict, Any, Optional
+import time
+from typing import List, Dict, Any, Optional, Tuple
 from dataclasses import dataclass
 
 from .database import Database
 from .config import Config
 
 
-@dataclass
+@dataclass(slots=True, frozen=True)
 class PriceChange:
     """Represents a significant price change"""
     condition_id: str
@@ -20,8 +20,30 @@ class PriceChange:
     change_percent: float
     change_absolute: float
     time_window_minutes: int
-    old_timestamp: str
-    new_timestamp: str
+    old_timestamp: int
+    new_timestamp: int
+
+
+# Sort orders the change queries can delegate to SQLite
+_ORDER_CLAUSES = {
+    'abs': 'ORDER BY ABS(change_percent) DESC',
+    'up': 'ORDER BY change_percent DESC',
+    'down': 'ORDER BY change_percent ASC',
+}
+
+
+def _change_filters(order: str, threshold: Optional[float]):
+    """Build SQL filter clauses so rejected rows never reach Python"""
+    clauses = []
+    params = []
+    if threshold is not None:
+        clauses.append('ABS(change_percent) >= ?')
+        params.append(threshold)
+    if order == 'up':
+        clauses.append('change_percent > 0')
+    elif order == 'down':
+        clauses.append('change_percent < 0')
+    return ' AND '.join(clauses) or '1=1', params
 
 
 class MarketAnalyzer:
@@ -29,20 +51,296 @@ class MarketAnalyzer:
 
     def __init__(self, db: Optional[Database] = None):
         self.db = db or Database()
+        # Specialized bulk-query SQL keyed by (window, order, has_threshold);
+        # the window literal is baked in so the planner sees a constant and
+        # repeat calls reuse the identical statement text
+        self._bulk_sql_cache: Dict[tuple, str] = {}
+        # token_id -> (condition_id, question, outcome), loaded lazily and
+        # kept for one scan interval so per-token lookups skip the join
+        self._token_map: Optional[Dict[str, Tuple[str, str, str]]] = None
+        self._token_map_loaded_at = 0.0
+
+    @staticmethod
+    def _change_from_row(row, time_window_minutes: int) -> PriceChange:
+        """Build a PriceChange from a change-query row.
+
+        Rows unpack positionally (cheaper than keyed Row access), so the
+        cache and bulk queries must keep the same column order.
+        """
+        (condition_id, question, token_id, outcome,
+         old_price, new_price, _, old_timestamp, new_timestamp) = row
+
+        change_absolute = new_price - old_price
+        change_percent = (change_absolute / old_price * 100) if old_price > 0 else 0
+
+        return PriceChange(
+            condition_id=condition_id,
+            question=question,
+            token_id=token_id,
+            outcome=outcome,
+            old_price=old_price,
+            new_price=new_price,
+            change_percent=change_percent,
+            change_absolute=change_absolute,
+            time_window_minutes=time_window_minutes,
+            old_timestamp=old_timestamp,
+            new_timestamp=new_timestamp
+        )
+
+    def _cached_changes(
+        self,
+        time_window_minutes: int,
+        order: str = 'abs',
+        limit: Optional[int] = None,
+        threshold: Optional[float] = None
+    ) -> Optional[List[PriceChange]]:
+        """Read pre-aggregated changes from the scanner-maintained cache.
+
+        Returns None when the window is not tracked or the cache has not
+        been refreshed recently, so callers can fall back to the live
+        windowed query.
+        """
+
+        if time_window_minutes not in Config.TRACKED_WINDOWS:
+            return None
+
+        max_age_seconds = Config.SCAN_INTERVAL_SECONDS * 2
+        filters, filter_params = _change_filters(order, threshold)
+
+        with self.db.get_readonly_connection() as conn:
+            cursor = conn.cursor()
+            cursor.execute(f'''
+                SELECT
+                    t.condition_id,
+                    t.question,
+                    c.token_id,
+                    t.outcome,
+                    c.old_price,
+                    c.new_price,
+                    c.change_percent,
+                    c.old_timestamp,
+                    c.new_timestamp
+                FROM token_change_cache c
+                JOIN v_active_tokens t ON t.token_id = c.token_id
+                WHERE c.window_minutes = ?
+                    AND c.updated_at >= datetime('now', ?)
+                    AND {filters}
+                {_ORDER_CLAUSES[order]}
+                LIMIT ?
+            ''', (
+                time_window_minutes,
+                f'-{max_age_seconds} seconds',
+                *filter_params,
+                limit if limit is not None else -1
+            ))
+
+            rows = cursor.fetchall()
+
+            if not rows:
+                # Distinguish "fresh cache, nothing matched" from a
+                # stale/empty cache that needs the live fallback
+                cursor.execute('''
+                    SELECT 1 FROM token_change_cache
+                    WHERE window_minutes = ? AND updated_at >= datetime('now', ?)
+                    LIMIT 1
+                ''', (time_window_minutes, f'-{max_age_seconds} seconds'))
+                if cursor.fetchone() is None:
+                    return None
+
+        return [self._change_from_row(row, time_window_minutes) for row in rows]
+
+    def _changes_for_window(
+        self,
+        time_window_minutes: int,
+        order: str = 'abs',
+        limit: Optional[int] = None,
+        threshold: Optional[float] = None
+    ) -> List[PriceChange]:
+        """Get active-token changes sorted by SQLite, preferring the scan-time cache"""
+        changes = self._cached_changes(time_window_minutes, order, limit, threshold)
+        if changes is None:
+            changes = self._bulk_latest_and_windowed(
+                time_window_minutes, order, limit, threshold
+            )
+        return changes
+
+    def _bulk_latest_and_windowed(
+        self,
+        time_window_minutes: int,
+        order: str = 'abs',
+        limit: Optional[int] = None,
+        threshold: Optional[float] = None
+    ) -> List[PriceChange]:
+        """Compute price changes for all active tokens in a single query.
+
+        Returns one PriceChange per active token that has both a latest
+        price and a price at least ``time_window_minutes`` old. Doing this
+        as one windowed query avoids issuing several SELECTs per token.
+        """
+
+        filters, filter_params = _change_filters(order, threshold)
+        window = int(time_window_minutes)
+
+        key = (window, order, threshold is not None)
+        sql = self._bulk_sql_cache.get(key)
+        if sql is None:
+            sql = self._bulk_sql_cache[key] = f'''
+                WITH latest AS (
+                    SELECT token_id, price, timestamp,
+                           ROW_NUMBER() OVER (
+                               PARTITION BY token_id ORDER BY timestamp DESC
+                           ) AS rn
+                    FROM price_history
+                ),
+                old AS (
+                    SELECT ph.token_id, ph.price, ph.timestamp,
+                           ROW_NUMBER() OVER (
+                               PARTITION BY ph.token_id ORDER BY ph.timestamp DESC
+                           ) AS rn
+                    FROM price_history ph
+                    JOIN latest l ON l.token_id = ph.token_id AND l.rn = 1
+                    WHERE ph.timestamp <= strftime('%s', 'now') - {window * 60}
+                )
+                SELECT * FROM (
+                    SELECT
+                        t.condition_id,
+                        t.question,
+                        l.token_id,
+                        t.outcome,
+                        o.price / 1000000.0 AS old_price,
+                        l.price / 1000000.0 AS new_price,
+                        CASE WHEN o.price > 0
+                             THEN (l.price - o.price) * 100.0 / o.price
+                             ELSE 0 END AS change_percent,
+                        o.timestamp AS old_timestamp,
+                        l.timestamp AS new_timestamp
+                    FROM latest l
+                    JOIN old o ON o.token_id = l.token_id AND o.rn = 1
+                    JOIN v_active_tokens t ON t.token_id = l.token_id
+                    WHERE l.rn = 1
+                )
+                WHERE {filters}
+                {_ORDER_CLAUSES[order]}
+                LIMIT ?
+            '''
+
+        with self.db.get_readonly_connection() as conn:
+            cursor = conn.cursor()
+            cursor.execute(sql, (
+                *filter_params,
+                limit if limit is not None else -1
+            ))
+
+            return [
+                self._change_from_row(row, time_window_minutes)
+                for row in cursor.fetchall()
+            ]
+
+    def calculate_price_changes_bulk(
+        self,
+        token_ids: List[str],
+        time_window_minutes: int
+    ) -> Dict[str, PriceChange]:
+        """Calculate price changes for a set of tokens in one query.
+
+        Returns a dict keyed by token_id; tokens without enough history
+        to cover the window are absent.
+        """
+
+        if not token_ids:
+            return {}
+
+        # Temp-table filter needs a writable connection; the id list goes
+        # through one reusable statement instead of N placeholders
+        with self.db.get_connection() as conn:
+            self.db.load_temp_token_filter(conn, token_ids)
+            cursor = conn.cursor()
+            cursor.execute('''
+                WITH latest AS (
+                    SELECT token_id, price, timestamp,
+                           ROW_NUMBER() OVER (
+                               PARTITION BY token_id ORDER BY timestamp DESC
+                           ) AS rn
+                    FROM price_history
+                    JOIN tok_filter USING (token_id)
+                ),
+                old AS (
+                    SELECT ph.token_id, ph.price, ph.timestamp,
+                           ROW_NUMBER() OVER (
+                               PARTITION BY ph.token_id ORDER BY ph.timestamp DESC
+                           ) AS rn
+                    FROM price_history ph
+                    JOIN latest l ON l.token_id = ph.token_id AND l.rn = 1
+                    WHERE ph.timestamp <= strftime('%s', 'now') - ?
+                )
+                SELECT
+                    m.condition_id,
+                    m.question,
+                    l.token_id,
+                    t.outcome,
+                    o.price / 1000000.0 AS old_price,
+                    l.price / 1000000.0 AS new_price,
+                    CASE WHEN o.price > 0
+                         THEN (l.price - o.price) * 100.0 / o.price
+                         ELSE 0 END AS change_percent,
+                    o.timestamp AS old_timestamp,
+                    l.timestamp AS new_timestamp
+                FROM latest l
+                JOIN old o ON o.token_id = l.token_id AND o.rn = 1
+                JOIN tokens t ON t.token_id = l.token_id
+                JOIN markets m ON m.condition_id = t.condition_id
+                WHERE l.rn = 1
+            ''', (time_window_minutes * 60,))
+
+            return {
+                row['token_id']: self._change_from_row(row, time_window_minutes)
+                for row in cursor.fetchall()
+            }
+
+    def _load_token_market_map(self) -> Dict[str, Tuple[str, str, str]]:
+        """Map every active token to its (condition_id, question, outcome).
+
+        Loaded with one join query and cached for a scan interval; the
+        market/token annotations only change when the scanner runs.
+        """
+
+        now = time.monotonic()
+        if (self._token_map is None
+                or now - self._token_map_loaded_at > Config.SCAN_INTERVAL_SECONDS):
+            with self.db.get_readonly_connection() as conn:
+                cursor = conn.cursor()
+                cursor.execute(
+                    'SELECT token_id, condition_id, question, outcome FROM v_active_tokens'
+                )
+                self._token_map = {
+                    token_id: (condition_id, question, outcome)
+                    for token_id, condition_id, question, outcome in cursor.fetchall()
+                }
+            self._token_map_loaded_at = now
+
+        return self._token_map
 
     def calculate_price_change(
         self,
         token_id: str,
-        time_window_minutes: int
+        time_window_minutes: int,
+        info: Optional[Tuple[str, str, str]] = None
     ) -> Optional[PriceChange]:
-        """Calculate price change for a token over a time window"""
+        """Calculate price change for a token over a time window.
 
-        with self.db.get_connection() as conn:
+        ``info`` may carry a pre-fetched (condition_id, question, outcome)
+        tuple to skip the market/token join entirely.
+        """
+
+        if info is None:
+            info = self._load_token_market_map().get(token_id)
+
+        with self.db.get_readonly_connection() as conn:
             cursor = conn.cursor()
 
             # Get latest price
             cursor.execute('''
-                SELECT price, timestamp
+                SELECT price / 1000000.0 AS price, timestamp
                 FROM price_history
                 WHERE token_id = ?
                 ORDER BY timestamp DESC
@@ -56,16 +354,18 @@ class MarketAnalyzer:
             new_price = latest['price']
             new_timestamp = latest['timestamp']
 
-            # Get price from time window ago
-            cutoff_time = datetime.fromisoformat(new_timestamp) - timedelta(minutes=time_window_minutes)
+            # Get price from time window ago (epoch math, no date
+            # parsing). The window is anchored at wall-clock now, not at
+            # the latest row: unchanged prices are not re-stored, so the
+            # latest row simply marks when the price last moved
             cursor.execute('''
-                SELECT price, timestamp
+                SELECT price / 1000000.0 AS price, timestamp
                 FROM price_history
                 WHERE token_id = ?
                     AND timestamp <= ?
                 ORDER BY timestamp DESC
                 LIMIT 1
-            ''', (token_id, cutoff_time.isoformat()))
+            ''', (token_id, int(time.time()) - time_window_minutes * 60))
 
             old = cursor.fetchone()
             if not old:
@@ -78,23 +378,28 @@ class MarketAnalyzer:
             change_absolute = new_price - old_price
             change_percent = (change_absolute / old_price * 100) if old_price > 0 else 0
 
-            # Get market and token info
-            cursor.execute('''
-                SELECT m.condition_id, m.question, t.outcome
-                FROM tokens t
-                JOIN markets m ON t.condition_id = m.condition_id
-                WHERE t.token_id = ?
-            ''', (token_id,))
+            # Get market and token info; only needed when the token is
+            # absent from the active-token map (e.g. a closed market)
+            if info is None:
+                cursor.execute('''
+                    SELECT m.condition_id, m.question, t.outcome
+                    FROM tokens t
+                    JOIN markets m ON t.condition_id = m.condition_id
+                    WHERE t.token_id = ?
+                ''', (token_id,))
 
-            info = cursor.fetchone()
-            if not info:
-                return None
+                row = cursor.fetchone()
+                if not row:
+                    return None
+                info = (row['condition_id'], row['question'], row['outcome'])
+
+            condition_id, question, outcome = info
 
             return PriceChange(
-                condition_id=info['condition_id'],
-                question=info['question'],
+                condition_id=condition_id,
+                question=question,
                 token_id=token_id,
-                outcome=info['outcome'],
+                outcome=outcome,
                 old_price=old_price,
                 new_price=new_price,
                 change_percent=change_percent,
@@ -115,30 +420,10 @@ class MarketAnalyzer:
         threshold = threshold_percent or Config.DEFAULT_CHANGE_THRESHOLD
         time_window = time_window_minutes or Config.TIME_WINDOW_MINUTES
 
-        # Get all active tokens
-        with self.db.get_connection() as conn:
-            cursor = conn.cursor()
-            cursor.execute('''
-                SELECT DISTINCT t.token_id
-                FROM tokens t
-                JOIN markets m ON t.condition_id = m.condition_id
-                WHERE m.active = 1 AND m.closed = 0
-            ''')
-            tokens = [row['token_id'] for row in cursor.fetchall()]
-
-        # Calculate changes for all tokens
-        significant_changes = []
-
-        for token_id in tokens:
-            change = self.calculate_price_change(token_id, time_window)
-
-            if change and abs(change.change_percent) >= threshold:
-                significant_changes.append(change)
-
-        # Sort by absolute change percentage (descending)
-        significant_changes.sort(key=lambda x: abs(x.change_percent), reverse=True)
-
-        return significant_changes[:limit]
+        # Filtered, sorted and limited entirely by SQLite
+        return self._changes_for_window(
+            time_window, order='abs', limit=limit, threshold=threshold
+        )
 
     def get_top_movers(
         self,
@@ -150,35 +435,10 @@ class MarketAnalyzer:
 
         time_window = time_window_minutes or Config.TIME_WINDOW_MINUTES
 
-        # Get all active tokens
-        with self.db.get_connection() as conn:
-            cursor = conn.cursor()
-            cursor.execute('''
-                SELECT DISTINCT t.token_id
-                FROM tokens t
-                JOIN markets m ON t.condition_id = m.condition_id
-                WHERE m.active = 1 AND m.closed = 0
-            ''')
-            tokens = [row['token_id'] for row in cursor.fetchall()]
-
-        # Calculate changes
-        changes = []
-        for token_id in tokens:
-            change = self.calculate_price_change(token_id, time_window)
-            if change:
-                changes.append(change)
-
-        # Filter by direction
-        if direction == 'up':
-            changes = [c for c in changes if c.change_percent > 0]
-            changes.sort(key=lambda x: x.change_percent, reverse=True)
-        elif direction == 'down':
-            changes = [c for c in changes if c.change_percent < 0]
-            changes.sort(key=lambda x: x.change_percent)
-        else:  # both
-            changes.sort(key=lambda x: abs(x.change_percent), reverse=True)
-
-        return changes[:limit]
+        order = direction if direction in ('up', 'down') else 'abs'
+
+        # Direction filter, sort and limit all happen inside SQLite
+        return self._changes_for_window(time_window, order=order, limit=limit)
 
     def get_market_summary(self, condition_id: str) -> Optional[Dict[str, Any]]:
         """Get comprehensive summary for a specific market"""
@@ -188,43 +448,44 @@ class MarketAnalyzer:
             return None
 
         # Get tokens and latest prices
-        with self.db.get_connection() as conn:
+        with self.db.get_readonly_connection() as conn:
             cursor = conn.cursor()
             cursor.execute('''
                 SELECT
                     t.token_id,
                     t.outcome,
-                    ph.price,
-                    ph.timestamp
+                    ph.price / 1000000.0 AS price,
+                    strftime('%Y-%m-%d %H:%M', ph.timestamp, 'unixepoch') AS timestamp
                 FROM tokens t
-                LEFT JOIN (
-                    SELECT token_id, price, timestamp
-                    FROM price_history
-                    WHERE (token_id, timestamp) IN (
-                        SELECT token_id, MAX(timestamp)
+                LEFT JOIN price_history ph
+                    ON ph.token_id = t.token_id
+                    AND ph.timestamp = (
+                        SELECT MAX(timestamp)
                         FROM price_history
-                        GROUP BY token_id
+                        WHERE token_id = t.token_id
                     )
-                ) ph ON t.token_id = ph.token_id
                 WHERE t.condition_id = ?
             ''', (condition_id,))
 
-            tokens = [dict(row) for row in cursor.fetchall()]
+            tokens = cursor.fetchall()
 
-        # Calculate changes for each token
-        token_changes = []
-        for token in tokens:
-            change = self.calculate_price_change(
-                token['token_id'],
-                Config.TIME_WINDOW_MINUTES
-            )
-            token_changes.append({
-                'token_id': token['token_id'],
-                'outcome': token['outcome'],
-                'current_price': token['price'],
-                'timestamp': token['timestamp'],
-                'change': change
-            })
+        # Calculate changes for all tokens in one query; rows are
+        # unpacked positionally instead of materializing per-row dicts
+        changes = self.calculate_price_changes_bulk(
+            [row[0] for row in tokens],
+            Config.TIME_WINDOW_MINUTES
+        )
+
+        token_changes = [
+            {
+                'token_id': token_id,
+                'outcome': outcome,
+                'current_price': price,
+                'timestamp': timestamp,
+                'change': changes.get(token_id)
+            }
+            for token_id, outcome, price, timestamp in tokens
+        ]
 
         return {
             'market': market,
@@ -239,39 +500,114 @@ class MarketAnalyzer:
         """Get markets with the most volatility/activity"""
 
         time_window = time_window_minutes or Config.TIME_WINDOW_MINUTES
+        min_change_percent = 1  # Lower threshold to capture more activity
 
-        # Get all significant changes
-        changes = self.find_significant_changes(
-            threshold_percent=1,  # Lower threshold to capture more activity
-            time_window_minutes=time_window,
-            limit=1000
-        )
+        rows = self._trending_from_cache(time_window, min_change_percent, limit)
+        if rows is None:
+            rows = self._trending_live(time_window, min_change_percent, limit)
 
-        # Group by market
-        market_changes = {}
-        for change in changes:
-            cid = change.condition_id
-            if cid not in market_changes:
-                market_changes[cid] = {
-                    'condition_id': cid,
-                    'question': change.question,
-                    'max_change': 0,
-                    'total_volatility': 0,
-                    'num_changes': 0
-                }
+        return [dict(row) for row in rows]
 
-            market_changes[cid]['max_change'] = max(
-                market_changes[cid]['max_change'],
-                abs(change.change_percent)
-            )
-            market_changes[cid]['total_volatility'] += abs(change.change_percent)
-            market_changes[cid]['num_changes'] += 1
-
-        # Sort by total volatility
-        trending = sorted(
-            market_changes.values(),
-            key=lambda x: x['total_volatility'],
-            reverse=True
-        )
+    def _trending_from_cache(
+        self,
+        time_window_minutes: int,
+        min_change_percent: float,
+        limit: int
+    ):
+        """Aggregate trending markets from the scan-time cache, or None if stale"""
 
-        return trending[:limit]
+        if time_window_minutes not in Config.TRACKED_WINDOWS:
+            return None
+
+        max_age_seconds = Config.SCAN_INTERVAL_SECONDS * 2
+
+        with self.db.get_readonly_connection() as conn:
+            cursor = conn.cursor()
+            cursor.execute('''
+                SELECT 1 FROM token_change_cache
+                WHERE window_minutes = ? AND updated_at >= datetime('now', ?)
+                LIMIT 1
+            ''', (time_window_minutes, f'-{max_age_seconds} seconds'))
+            if cursor.fetchone() is None:
+                return None
+
+            cursor.execute('''
+                SELECT
+                    t.condition_id,
+                    t.question,
+                    MAX(ABS(c.change_percent)) AS max_change,
+                    SUM(ABS(c.change_percent)) AS total_volatility,
+                    COUNT(*) AS num_changes
+                FROM token_change_cache c
+                JOIN v_active_tokens t ON t.token_id = c.token_id
+                WHERE c.window_minutes = ?
+                    AND c.updated_at >= datetime('now', ?)
+                    AND ABS(c.change_percent) >= ?
+                GROUP BY t.condition_id
+                ORDER BY total_volatility DESC
+                LIMIT ?
+            ''', (
+                time_window_minutes,
+                f'-{max_age_seconds} seconds',
+                min_change_percent,
+                limit
+            ))
+
+            return cursor.fetchall()
+
+    def _trending_live(
+        self,
+        time_window_minutes: int,
+        min_change_percent: float,
+        limit: int
+    ):
+        """Aggregate trending markets directly from price_history"""
+
+        with self.db.get_readonly_connection() as conn:
+            cursor = conn.cursor()
+            cursor.execute('''
+                WITH latest AS (
+                    SELECT token_id, price, timestamp,
+                           ROW_NUMBER() OVER (
+                               PARTITION BY token_id ORDER BY timestamp DESC
+                           ) AS rn
+                    FROM price_history
+                ),
+                old AS (
+                    SELECT ph.token_id, ph.price, ph.timestamp,
+                           ROW_NUMBER() OVER (
+                               PARTITION BY ph.token_id ORDER BY ph.timestamp DESC
+                           ) AS rn
+                    FROM price_history ph
+                    JOIN latest l ON l.token_id = ph.token_id AND l.rn = 1
+                    WHERE ph.timestamp <= strftime('%s', 'now') - ?
+                )
+                SELECT
+                    condition_id,
+                    question,
+                    MAX(ABS(change_percent)) AS max_change,
+                    SUM(ABS(change_percent)) AS total_volatility,
+                    COUNT(*) AS num_changes
+                FROM (
+                    SELECT
+                        t.condition_id,
+                        t.question,
+                        CASE WHEN o.price > 0
+                             THEN (l.price - o.price) * 100.0 / o.price
+                             ELSE 0 END AS change_percent
+                    FROM latest l
+                    JOIN old o ON o.token_id = l.token_id AND o.rn = 1
+                    JOIN v_active_tokens t ON t.token_id = l.token_id
+                    WHERE l.rn = 1
+                )
+                WHERE ABS(change_percent) >= ?
+                GROUP BY condition_id
+                ORDER BY total_volatility DESC
+                LIMIT ?
+            ''', (
+                time_window_minutes * 60,
+                min_change_percent,
+                limit
+            ))
+
+            return cursor.fetchall()
@@ -1,18 +1,19 @@
 """Command-line interface for Polymarket Scanner"""
 
+import functools
+
 import click
-from rich.console import Console
-from rich.table import Table
-from rich.panel import Panel
-from rich.progress import track
-from datetime import datetime
 
-from .scanner import PolymarketScanner
-from .analyzer import MarketAnalyzer
-from .database import Database
-from .config import Config
+# Heavy imports (rich, the API client pulled in by the scanner, dotenv via
+# config) are deferred into the commands that need them so every invocation
+# only pays for what it uses.
+
 
-console = Console()
+@functools.cache
+def _console():
+    """Shared Console, constructed on first use"""
+    from rich.console import Console
+    return Console()
 
 
 @click.group()
@@ -24,6 +25,12 @@ def cli():
 @cli.command()
 def scan():
     """Perform a full scan of Polymarket markets and prices"""
+    from rich.panel import Panel
+
+    from .scanner import PolymarketScanner, setup_logging
+
+    setup_logging()
+    console = _console()
     scanner = PolymarketScanner()
 
     with console.status("[bold green]Scanning Polymarket..."):
@@ -45,6 +52,12 @@ def scan():
 @click.option('--limit', '-l', default=20, type=int, help='Maximum number of results')
 def changes(threshold, window, limit):
     """Show significant price changes"""
+    from rich.table import Table
+
+    from .analyzer import MarketAnalyzer
+    from .config import Config
+
+    console = _console()
     analyzer = MarketAnalyzer()
 
     threshold = threshold or Config.DEFAULT_CHANGE_THRESHOLD
@@ -71,15 +84,20 @@ def changes(threshold, window, limit):
     table.add_column("New Price", justify="right")
     table.add_column("Change", justify="right")
 
-    for change in significant_changes:
-        # Color code based on direction
-        if change.change_percent > 0:
-            change_str = f"[green]+{change.change_percent:.2f}%[/green]"
-        else:
-            change_str = f"[red]{change.change_percent:.2f}%[/red]"
-
+    # Precompute display strings in one pass each before building rows
+    questions = [
+        c.question[:50] + "..." if len(c.question) > 50 else c.question
+        for c in significant_changes
+    ]
+    change_strs = [
+        f"[green]+{c.change_percent:.2f}%[/green]" if c.change_percent > 0
+        else f"[red]{c.change_percent:.2f}%[/red]"
+        for c in significant_changes
+    ]
+
+    for change, question, change_str in zip(significant_changes, questions, change_strs):
         table.add_row(
-            change.question[:50] + "..." if len(change.question) > 50 else change.question,
+            question,
             change.outcome,
             f"{change.old_price:.4f}",
             f"{change.new_price:.4f}",
@@ -96,6 +114,12 @@ def changes(threshold, window, limit):
 @click.option('--direction', '-d', type=click.Choice(['up', 'down', 'both']), default='both', help='Filter by direction')
 def movers(window, limit, direction):
     """Show top price movers"""
+    from rich.table import Table
+
+    from .analyzer import MarketAnalyzer
+    from .config import Config
+
+    console = _console()
     analyzer = MarketAnalyzer()
 
     window = window or Config.TIME_WINDOW_MINUTES
@@ -121,16 +145,21 @@ def movers(window, limit, direction):
     table.add_column("Price", justify="right")
     table.add_column("Change", justify="right")
 
-    for idx, change in enumerate(top_movers, 1):
-        # Color code based on direction
-        if change.change_percent > 0:
-            change_str = f"[green]+{change.change_percent:.2f}%[/green]"
-        else:
-            change_str = f"[red]{change.change_percent:.2f}%[/red]"
-
+    # Precompute display strings in one pass each before building rows
+    questions = [
+        c.question[:45] + "..." if len(c.question) > 45 else c.question
+        for c in top_movers
+    ]
+    change_strs = [
+        f"[green]+{c.change_percent:.2f}%[/green]" if c.change_percent > 0
+        else f"[red]{c.change_percent:.2f}%[/red]"
+        for c in top_movers
+    ]
+
+    for idx, (change, question, change_str) in enumerate(zip(top_movers, questions, change_strs), 1):
         table.add_row(
             str(idx),
-            change.question[:45] + "..." if len(change.question) > 45 else change.question,
+            question,
             change.outcome,
             f"{change.new_price:.4f}",
             change_str
@@ -144,6 +173,12 @@ def movers(window, limit, direction):
 @click.option('--limit', '-l', default=10, type=int, help='Maximum number of results')
 def trending(window, limit):
     """Show trending markets (most volatile)"""
+    from rich.table import Table
+
+    from .analyzer import MarketAnalyzer
+    from .config import Config
+
+    console = _console()
     analyzer = MarketAnalyzer()
 
     window = window or Config.TIME_WINDOW_MINUTES
@@ -167,10 +202,15 @@ def trending(window, limit):
     table.add_column("Max Change", justify="right")
     table.add_column("Total Volatility", justify="right")
 
-    for idx, market in enumerate(trending_markets, 1):
+    questions = [
+        m['question'][:55] + "..." if len(m['question']) > 55 else m['question']
+        for m in trending_markets
+    ]
+
+    for idx, (market, question) in enumerate(zip(trending_markets, questions), 1):
         table.add_row(
             str(idx),
-            market['question'][:55] + "..." if len(market['question']) > 55 else market['question'],
+            question,
             f"{market['max_change']:.2f}%",
             f"{market['total_volatility']:.2f}%"
         )
@@ -182,6 +222,12 @@ def trending(window, limit):
 @click.argument('condition_id')
 def market(condition_id):
     """Show detailed information for a specific market"""
+    from rich.panel import Panel
+    from rich.table import Table
+
+    from .analyzer import MarketAnalyzer
+
+    console = _console()
     analyzer = MarketAnalyzer()
 
     with console.status("[bold yellow]Fetching market data..."):
@@ -225,12 +271,8 @@ def market(condition_id):
 
         price_str = f"{token['current_price']:.4f}" if token['current_price'] else "[dim]N/A[/dim]"
 
-        timestamp = token['timestamp']
-        if timestamp:
-            dt = datetime.fromisoformat(timestamp)
-            time_str = dt.strftime('%Y-%m-%d %H:%M')
-        else:
-            time_str = "[dim]N/A[/dim]"
+        # Timestamp arrives pre-formatted by SQLite
+        time_str = token['timestamp'] or "[dim]N/A[/dim]"
 
         table.add_row(
             token['outcome'],
@@ -245,6 +287,11 @@ def market(condition_id):
 @cli.command()
 def stats():
     """Show database statistics"""
+    from rich.table import Table
+
+    from .database import Database
+
+    console = _console()
     db = Database()
     stats = db.get_stats()
 
@@ -265,6 +312,11 @@ def stats():
 @cli.command()
 def config_info():
     """Show current configuration"""
+    from rich.panel import Panel
+
+    from .config import Config
+
+    console = _console()
     info = f"""
 [bold]Configuration[/bold]
 
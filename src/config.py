@@ -1,11 +1,25 @@
 """Configuration management for Polymarket Scanner"""
 
+import functools
 import os
 from pathlib import Path
-from dotenv import load_dotenv
 
-# Load environment variables
-load_dotenv()
+# Load environment variables; skip the dotenv import entirely when there
+# is no .env file to read. The file lives next to the project root, not
+# the current working directory, so resolve it relative to this module
+_ENV_FILE = Path(__file__).resolve().parent.parent / '.env'
+if _ENV_FILE.exists():
+    from dotenv import load_dotenv
+    load_dotenv(_ENV_FILE)
+
+
+@functools.cache
+def _compute_db_path() -> Path:
+    """Resolve the database path once; the result never changes at runtime"""
+    if os.path.isabs(Config.DATABASE_PATH):
+        return Path(Config.DATABASE_PATH)
+    return Config.BASE_DIR / Config.DATABASE_PATH
+
 
 class Config:
     """Application configuration"""
@@ -19,13 +33,15 @@ class Config:
     DEFAULT_CHANGE_THRESHOLD = float(os.getenv('DEFAULT_CHANGE_THRESHOLD', '5'))
     TIME_WINDOW_MINUTES = int(os.getenv('TIME_WINDOW_MINUTES', '60'))
 
+    # Time windows (minutes) pre-aggregated into the change cache at scan time
+    TRACKED_WINDOWS = (15, 60, 240, 1440)
+
     # API settings
     CLOB_API_URL = os.getenv('CLOB_API_URL', 'https://clob.polymarket.com')
     CHAIN_ID = int(os.getenv('CHAIN_ID', '137'))
+    API_QPS = float(os.getenv('API_QPS', '20'))
 
     @classmethod
     def get_db_path(cls) -> Path:
-        """Get absolute path to database file"""
-        if os.path.isabs(cls.DATABASE_PATH):
-            return Path(cls.DATABASE_PATH)
-        return cls.BASE_DIR / cls.DATABASE_PATH
+        """Get absolute path to database file (cached after first call)"""
+        return _compute_db_path()
@@ -1,12 +1,74 @@
 """Database management for storing market data and price history"""
 
 import sqlite3
-from datetime import datetime
+import threading
+import time
+from collections import OrderedDict
 from pathlib import Path
-from typing import List, Dict, Any, Optional
+from typing import Any, Dict, Iterator, List, Optional
 from contextlib import contextmanager
 
 from .config import Config
+from .retry import retry_transient
+
+# Prices are probabilities in [0, 1]; stored as INTEGER micro-units
+# (0..1_000_000) so rows stay narrow and no float parsing happens on read
+PRICE_SCALE = 1_000_000
+
+# Timestamps are INTEGER Unix epoch seconds: a third the bytes of the
+# old ISO-8601 strings, and range filters become plain integer compares
+_PRICE_HISTORY_SCHEMA = '''
+    CREATE TABLE IF NOT EXISTS price_history (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        token_id TEXT NOT NULL,
+        condition_id TEXT NOT NULL,
+        price INTEGER NOT NULL,
+        timestamp INTEGER NOT NULL,
+        created_at TEXT DEFAULT CURRENT_TIMESTAMP,
+        FOREIGN KEY (token_id) REFERENCES tokens(token_id),
+        FOREIGN KEY (condition_id) REFERENCES markets(condition_id)
+    )
+'''
+
+
+# Hot-path statements as shared module-level literals: sqlite3 caches
+# compiled statements by exact SQL text, so routing every call through
+# the same string guarantees the VDBE bytecode is reused rather than
+# reparsed per call
+_UPSERT_MARKET_SQL = '''
+    INSERT INTO markets (
+        condition_id, question, description, end_date_iso,
+        game_start_time, market_slug, rewards_min_size,
+        rewards_max_spread, enable_order_book, active, closed, archived
+    ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+    ON CONFLICT(condition_id) DO UPDATE SET
+        question = excluded.question,
+        description = excluded.description,
+        end_date_iso = excluded.end_date_iso,
+        game_start_time = excluded.game_start_time,
+        market_slug = excluded.market_slug,
+        active = excluded.active,
+        closed = excluded.closed,
+        archived = excluded.archived,
+        updated_at = CURRENT_TIMESTAMP
+'''
+
+_UPSERT_TOKEN_SQL = '''
+    INSERT OR IGNORE INTO tokens (token_id, condition_id, outcome)
+    VALUES (?, ?, ?)
+'''
+
+_INSERT_PRICE_SQL = '''
+    INSERT INTO price_history (token_id, condition_id, price, timestamp)
+    VALUES (?, ?, ?, ?)
+'''
+
+# Bound on the per-instance market lookup cache
+_MARKET_CACHE_SIZE = 4096
+
+# Upsert batches below this size maintain idx_markets_active in place;
+# only larger loads defer the index with a drop/rebuild
+_INDEX_DEFER_MIN_ROWS = 500
 
 
 class Database:
@@ -14,21 +76,82 @@ class Database:
 
     def __init__(self, db_path: Optional[Path] = None):
         self.db_path = db_path or Config.get_db_path()
+        # Connections are cached per thread and reused across calls;
+        # sqlite3 connections must stay on their creating thread anyway
+        self._local = threading.local()
+        # LRU cache for market lookups, invalidated on upsert; a manual
+        # OrderedDict rather than lru_cache so entries can be evicted
+        # per condition_id and self never leaks into a global cache
+        self._market_cache: OrderedDict = OrderedDict()
         self.init_database()
 
+    @staticmethod
+    def _apply_pragmas(conn: sqlite3.Connection):
+        """Tune a fresh connection for a read-heavy workload"""
+        conn.execute('PRAGMA journal_mode=WAL')
+        conn.execute('PRAGMA synchronous=NORMAL')
+        conn.execute('PRAGMA mmap_size=268435456')
+        conn.execute('PRAGMA cache_size=-65536')
+        conn.execute('PRAGMA temp_store=MEMORY')
+        conn.execute('PRAGMA busy_timeout=5000')
+
+    def _get_conn(self) -> sqlite3.Connection:
+        """Lazily create and cache one writable connection per thread"""
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            conn = sqlite3.connect(self.db_path, cached_statements=256)
+            conn.row_factory = sqlite3.Row
+            self._apply_pragmas(conn)
+            self._local.conn = conn
+        return conn
+
+    def _get_readonly_conn(self) -> sqlite3.Connection:
+        """Lazily create and cache one read-only connection per thread"""
+        conn = getattr(self._local, 'ro_conn', None)
+        if conn is None:
+            conn = sqlite3.connect(
+                f'file:{self.db_path}?mode=ro', uri=True, cached_statements=256
+            )
+            conn.row_factory = sqlite3.Row
+            self._apply_pragmas(conn)
+            conn.execute('PRAGMA query_only=1')
+            self._local.ro_conn = conn
+        return conn
+
     @contextmanager
     def get_connection(self):
-        """Context manager for database connections"""
-        conn = sqlite3.connect(self.db_path)
-        conn.row_factory = sqlite3.Row
+        """Context manager for database connections.
+
+        Yields the calling thread's cached connection — reopening the
+        database (and its -wal/-shm files) per call was pure overhead.
+        Commits on success and rolls back on error; the connection stays
+        open for reuse until close().
+        """
+        conn = self._get_conn()
         try:
             yield conn
             conn.commit()
         except Exception as e:
             conn.rollback()
             raise e
-        finally:
-            conn.close()
+
+    @contextmanager
+    def get_readonly_connection(self):
+        """Context manager for read-only connections.
+
+        Opens the database in read-only mode so analyzer queries never
+        take write locks and cannot block the scanner. The connection is
+        cached per thread like the writable one.
+        """
+        yield self._get_readonly_conn()
+
+    def close(self):
+        """Close the calling thread's cached connections (for shutdown)"""
+        for attr in ('conn', 'ro_conn'):
+            conn = getattr(self._local, attr, None)
+            if conn is not None:
+                conn.close()
+                setattr(self._local, attr, None)
 
     def init_database(self):
         """Initialize database schema"""
@@ -67,23 +190,32 @@ class Database:
             ''')
 
             # Price history table
+            cursor.execute(_PRICE_HISTORY_SCHEMA)
+            self._migrate_price_history(cursor)
+
+            # REAL-price view for callers that predate micro-unit storage
             cursor.execute('''
-                CREATE TABLE IF NOT EXISTS price_history (
-                    id INTEGER PRIMARY KEY AUTOINCREMENT,
-                    token_id TEXT NOT NULL,
-                    condition_id TEXT NOT NULL,
-                    price REAL NOT NULL,
-                    timestamp TEXT NOT NULL,
-                    created_at TEXT DEFAULT CURRENT_TIMESTAMP,
-                    FOREIGN KEY (token_id) REFERENCES tokens(token_id),
-                    FOREIGN KEY (condition_id) REFERENCES markets(condition_id)
-                )
+                CREATE VIEW IF NOT EXISTS price_history_v AS
+                SELECT
+                    id,
+                    token_id,
+                    condition_id,
+                    price / 1000000.0 AS price,
+                    timestamp,
+                    created_at
+                FROM price_history
             ''')
 
-            # Create indexes for better query performance
+            # Create indexes for better query performance. Token-scoped
+            # reads go through one covering index carrying every column
+            # they select, so no row fetch back through the main B-tree
+            # is needed; the older narrow variants it supersedes are
+            # dropped from existing databases.
+            cursor.execute('DROP INDEX IF EXISTS idx_price_history_token_time')
+            cursor.execute('DROP INDEX IF EXISTS idx_price_history_token_time_price')
             cursor.execute('''
-                CREATE INDEX IF NOT EXISTS idx_price_history_token_time
-                ON price_history(token_id, timestamp DESC)
+                CREATE INDEX IF NOT EXISTS idx_ph_token_cover
+                ON price_history(token_id, timestamp DESC, price, condition_id)
             ''')
 
             cursor.execute('''
@@ -96,109 +228,482 @@ class Database:
                 ON markets(active, closed)
             ''')
 
+            # Shared shape for "tokens of open markets": analyzer and
+            # cache queries all join this instead of repeating the filter
+            cursor.execute('''
+                CREATE VIEW IF NOT EXISTS v_active_tokens AS
+                SELECT
+                    t.token_id,
+                    t.condition_id,
+                    t.outcome,
+                    m.question
+                FROM tokens t
+                JOIN markets m ON m.condition_id = t.condition_id
+                WHERE m.active = 1 AND m.closed = 0
+            ''')
+
+            # Pre-aggregated price changes, refreshed by the scanner so
+            # analyzer queries don't rescan price_history per invocation.
+            # Derived data: a cache predating epoch timestamps is simply
+            # dropped and rebuilt on the next scan
+            cursor.execute('PRAGMA table_info(token_change_cache)')
+            cache_types = {row[1]: row[2].upper() for row in cursor.fetchall()}
+            if cache_types.get('old_timestamp') == 'TEXT':
+                cursor.execute('DROP TABLE token_change_cache')
+
+            cursor.execute('''
+                CREATE TABLE IF NOT EXISTS token_change_cache (
+                    token_id TEXT NOT NULL,
+                    window_minutes INTEGER NOT NULL,
+                    old_price REAL NOT NULL,
+                    new_price REAL NOT NULL,
+                    change_percent REAL NOT NULL,
+                    old_timestamp INTEGER NOT NULL,
+                    new_timestamp INTEGER NOT NULL,
+                    updated_at TEXT DEFAULT CURRENT_TIMESTAMP,
+                    PRIMARY KEY (token_id, window_minutes)
+                )
+            ''')
+
+            cursor.execute('''
+                CREATE INDEX IF NOT EXISTS idx_change_cache_window_pct
+                ON token_change_cache(window_minutes, change_percent)
+            ''')
+
+            # Running row counters maintained by triggers, so get_stats
+            # does O(1) key lookups instead of COUNT(*) table scans.
+            # Seeded idempotently from the current contents; triggers
+            # keep them current from then on.
+            cursor.execute('''
+                CREATE TABLE IF NOT EXISTS stats (
+                    key TEXT PRIMARY KEY,
+                    value INTEGER NOT NULL
+                )
+            ''')
+            cursor.execute('''
+                INSERT OR IGNORE INTO stats (key, value)
+                SELECT 'total_markets', COUNT(*) FROM markets
+            ''')
+            cursor.execute('''
+                INSERT OR IGNORE INTO stats (key, value)
+                SELECT 'total_tokens', COUNT(*) FROM tokens
+            ''')
+            cursor.execute('''
+                INSERT OR IGNORE INTO stats (key, value)
+                SELECT 'total_prices', COUNT(*) FROM price_history
+            ''')
+
+            for table, key in (('markets', 'total_markets'),
+                               ('tokens', 'total_tokens'),
+                               ('price_history', 'total_prices')):
+                cursor.execute(f'''
+                    CREATE TRIGGER IF NOT EXISTS trg_{table}_count_ins
+                    AFTER INSERT ON {table}
+                    BEGIN
+                        UPDATE stats SET value = value + 1 WHERE key = '{key}';
+                    END
+                ''')
+                cursor.execute(f'''
+                    CREATE TRIGGER IF NOT EXISTS trg_{table}_count_del
+                    AFTER DELETE ON {table}
+                    BEGIN
+                        UPDATE stats SET value = value - 1 WHERE key = '{key}';
+                    END
+                ''')
+
+            # Refresh planner statistics so the new indexes get picked
+            cursor.execute('ANALYZE')
+
+    @staticmethod
+    def _migrate_price_history(cursor: sqlite3.Cursor):
+        """Rebuild price_history if it still uses legacy column types.
+
+        Converts REAL prices to INTEGER micro-units and TEXT ISO-8601
+        timestamps to INTEGER epoch seconds in a single rebuild.
+        """
+        cursor.execute('PRAGMA table_info(price_history)')
+        col_types = {row[1]: row[2].upper() for row in cursor.fetchall()}
+        legacy_price = col_types.get('price', '') == 'REAL'
+        legacy_timestamp = col_types.get('timestamp', '') == 'TEXT'
+        if not (legacy_price or legacy_timestamp):
+            return
+
+        price_expr = (
+            'CAST(ROUND(price * 1000000) AS INTEGER)' if legacy_price else 'price'
+        )
+        timestamp_expr = (
+            "CAST(strftime('%s', timestamp) AS INTEGER)"
+            if legacy_timestamp else 'timestamp'
+        )
+
+        cursor.execute('ALTER TABLE price_history RENAME TO price_history_legacy')
+        cursor.execute(_PRICE_HISTORY_SCHEMA)
+        cursor.execute(f'''
+            INSERT INTO price_history (
+                id, token_id, condition_id, price, timestamp, created_at
+            )
+            SELECT
+                id,
+                token_id,
+                condition_id,
+                {price_expr},
+                {timestamp_expr},
+                created_at
+            FROM price_history_legacy
+        ''')
+        cursor.execute('DROP TABLE price_history_legacy')
+
+    @staticmethod
+    def market_row(market_data: Dict[str, Any]) -> tuple:
+        """Build the parameter tuple _UPSERT_MARKET_SQL expects.
+
+        Runs once per market on the scanner hot path, so the .get
+        methods are bound once and the rewards dict is fetched a single
+        time instead of per field.
+        """
+        get = market_data.get
+        rewards_get = (get('rewards') or {}).get
+        return (
+            market_data['condition_id'],
+            market_data['question'],
+            get('description'),
+            get('end_date_iso'),
+            get('game_start_time'),
+            get('market_slug'),
+            rewards_get('min_size'),
+            rewards_get('max_spread'),
+            get('enable_order_book', 1),
+            get('active', 1),
+            get('closed', 0),
+            get('archived', 0)
+        )
+
     def upsert_market(self, market_data: Dict[str, Any]):
         """Insert or update market data"""
+        with self.get_connection() as conn:
+            cursor = conn.cursor()
+            cursor.execute(_UPSERT_MARKET_SQL, self.market_row(market_data))
+        self._market_cache.pop(market_data['condition_id'], None)
+
+    def bulk_ingest_markets(self, rows: List[tuple]) -> int:
+        """Upsert many market rows (built via market_row) in one transaction.
+
+        Small batches — the steady-state incremental scan adds a
+        handful of new markets at a time — maintain the active/closed
+        index in place; dropping and rebuilding it (and bumping the
+        schema cookie, which invalidates every cached statement) only
+        pays off once a load is big enough to amortize scanning the
+        whole table.
+        """
+        if not rows:
+            return 0
+
+        if len(rows) < _INDEX_DEFER_MIN_ROWS:
+            with self.get_connection() as conn:
+                conn.executemany(_UPSERT_MARKET_SQL, rows)
+            for row in rows:
+                self._market_cache.pop(row[0], None)
+            return len(rows)
+
+        return self.ingest_market_batches([rows])
+
+    def get_known_condition_ids(self) -> set:
+        """Return the set of condition ids already stored"""
+        with self.get_readonly_connection() as conn:
+            cursor = conn.cursor()
+            cursor.execute('SELECT condition_id FROM markets')
+            return {row[0] for row in cursor.fetchall()}
+
+    def sync_active_flags(self, active_condition_ids: List[str]) -> None:
+        """Mark the given markets active and deactivate all others.
+
+        Lets an incremental scan reconcile the active universe without
+        re-upserting every stored market row.
+        """
         with self.get_connection() as conn:
             cursor = conn.cursor()
             cursor.execute('''
-                INSERT INTO markets (
-                    condition_id, question, description, end_date_iso,
-                    game_start_time, market_slug, rewards_min_size,
-                    rewards_max_spread, enable_order_book, active, closed, archived
-                ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
-                ON CONFLICT(condition_id) DO UPDATE SET
-                    question = excluded.question,
-                    description = excluded.description,
-                    end_date_iso = excluded.end_date_iso,
-                    game_start_time = excluded.game_start_time,
-                    market_slug = excluded.market_slug,
-                    active = excluded.active,
-                    closed = excluded.closed,
-                    archived = excluded.archived,
-                    updated_at = CURRENT_TIMESTAMP
-            ''', (
-                market_data['condition_id'],
-                market_data['question'],
-                market_data.get('description'),
-                market_data.get('end_date_iso'),
-                market_data.get('game_start_time'),
-                market_data.get('market_slug'),
-                market_data.get('rewards', {}).get('min_size'),
-                market_data.get('rewards', {}).get('max_spread'),
-                market_data.get('enable_order_book', 1),
-                market_data.get('active', 1),
-                market_data.get('closed', 0),
-                market_data.get('archived', 0)
-            ))
+                CREATE TEMP TABLE IF NOT EXISTS act_filter (
+                    condition_id TEXT PRIMARY KEY
+                )
+            ''')
+            cursor.execute('DELETE FROM act_filter')
+            cursor.executemany(
+                'INSERT OR IGNORE INTO act_filter (condition_id) VALUES (?)',
+                ((condition_id,) for condition_id in active_condition_ids)
+            )
+            cursor.execute('''
+                UPDATE markets SET active = 1, closed = 0
+                WHERE condition_id IN (SELECT condition_id FROM act_filter)
+                  AND (active != 1 OR closed != 0)
+            ''')
+            cursor.execute('''
+                UPDATE markets SET active = 0
+                WHERE active = 1
+                  AND condition_id NOT IN (SELECT condition_id FROM act_filter)
+            ''')
+
+        # Flag flips can touch anything cached
+        self._market_cache.clear()
+
+    def ingest_market_batches(self, batches) -> int:
+        """Upsert market rows from an iterable of batches in one transaction.
+
+        Accepts lazily produced batches so the caller can stream rows in
+        as pages arrive from the API instead of materializing the whole
+        universe first. This is the full-reseed path: the active/closed
+        index is dropped for the duration of the load and rebuilt
+        afterwards — one sorted build instead of a B-tree rebalance per
+        row. Incremental upserts should go through bulk_ingest_markets,
+        which skips the rebuild for small batches.
+        """
+        count = 0
+        with self.get_connection() as conn:
+            cursor = conn.cursor()
+            # Explicit BEGIN pulls the DROP into the same transaction as
+            # the rows and the rebuild. sqlite3 would otherwise
+            # autocommit the DDL on its own, and a failed load would
+            # roll back the CREATE together with the rows — leaving the
+            # database without the index until the next init_database
+            cursor.execute('BEGIN')
+            cursor.execute('DROP INDEX IF EXISTS idx_markets_active')
+            for rows in batches:
+                cursor.executemany(_UPSERT_MARKET_SQL, rows)
+                count += len(rows)
+            cursor.execute('''
+                CREATE INDEX IF NOT EXISTS idx_markets_active
+                ON markets(active, closed)
+            ''')
+
+        # A reseed can touch anything; drop all cached lookups
+        self._market_cache.clear()
+        return count
 
     def upsert_token(self, token_id: str, condition_id: str, outcome: str):
         """Insert or update token data"""
         with self.get_connection() as conn:
             cursor = conn.cursor()
-            cursor.execute('''
-                INSERT OR IGNORE INTO tokens (token_id, condition_id, outcome)
-                VALUES (?, ?, ?)
-            ''', (token_id, condition_id, outcome))
+            cursor.execute(_UPSERT_TOKEN_SQL, (token_id, condition_id, outcome))
 
-    def insert_price(self, token_id: str, condition_id: str, price: float, timestamp: Optional[str] = None):
-        """Insert price data point"""
+    @retry_transient(sqlite3.OperationalError)
+    def insert_price(self, token_id: str, condition_id: str, price: float, timestamp: Optional[int] = None):
+        """Insert price data point (timestamp is Unix epoch seconds)"""
         if timestamp is None:
-            timestamp = datetime.utcnow().isoformat()
+            timestamp = int(time.time())
+
+        with self.get_connection() as conn:
+            cursor = conn.cursor()
+            cursor.execute(_INSERT_PRICE_SQL, (
+                token_id, condition_id, int(round(price * PRICE_SCALE)), timestamp
+            ))
+
+    @retry_transient(sqlite3.OperationalError)
+    def insert_prices_bulk(self, rows: List[tuple]) -> int:
+        """Insert many price points in a single transaction.
+
+        ``rows`` holds (token_id, condition_id, price, timestamp) tuples
+        with the price already in integer micro-units (see PRICE_SCALE),
+        so they pass straight to executemany with no per-row conversion.
+        One executemany per batch means one commit — and one WAL sync —
+        instead of one per row.
+        """
+        if not rows:
+            return 0
+
+        with self.get_connection() as conn:
+            conn.executemany(_INSERT_PRICE_SQL, rows)
+
+        return len(rows)
+
+    def upsert_tokens_bulk(self, rows: List[tuple]):
+        """Insert any new (token_id, condition_id, outcome) rows in one transaction"""
+        if not rows:
+            return
 
+        with self.get_connection() as conn:
+            conn.executemany(_UPSERT_TOKEN_SQL, rows)
+
+    @staticmethod
+    def load_temp_token_filter(conn: sqlite3.Connection, token_ids):
+        """Load token ids into a per-connection temp table.
+
+        Queries join tok_filter instead of expanding `IN (?, ?, ...)`
+        placeholders, so one compiled statement serves any id-list size
+        and SQLite's host-parameter limit never applies.
+        """
+        cursor = conn.cursor()
+        cursor.execute('''
+            CREATE TEMP TABLE IF NOT EXISTS tok_filter (
+                token_id TEXT PRIMARY KEY
+            )
+        ''')
+        cursor.execute('DELETE FROM tok_filter')
+        cursor.executemany(
+            'INSERT OR IGNORE INTO tok_filter (token_id) VALUES (?)',
+            ((token_id,) for token_id in token_ids)
+        )
+
+    def refresh_change_cache(self, window_minutes: int):
+        """Recompute cached price changes for one time window.
+
+        Upserts one row per active token so analyzer queries read the
+        pre-aggregated result instead of rescanning price_history. The
+        window cutoff is anchored at wall-clock now rather than at each
+        token's latest row — unchanged prices are not re-stored, so the
+        latest row only marks when the price last moved.
+        """
         with self.get_connection() as conn:
             cursor = conn.cursor()
             cursor.execute('''
-                INSERT INTO price_history (token_id, condition_id, price, timestamp)
-                VALUES (?, ?, ?, ?)
-            ''', (token_id, condition_id, price, timestamp))
+                WITH latest AS (
+                    SELECT token_id, price, timestamp,
+                           ROW_NUMBER() OVER (
+                               PARTITION BY token_id ORDER BY timestamp DESC
+                           ) AS rn
+                    FROM price_history
+                ),
+                old AS (
+                    SELECT ph.token_id, ph.price, ph.timestamp,
+                           ROW_NUMBER() OVER (
+                               PARTITION BY ph.token_id ORDER BY ph.timestamp DESC
+                           ) AS rn
+                    FROM price_history ph
+                    JOIN latest l ON l.token_id = ph.token_id AND l.rn = 1
+                    WHERE ph.timestamp <= strftime('%s', 'now') - ?
+                )
+                INSERT INTO token_change_cache (
+                    token_id, window_minutes, old_price, new_price,
+                    change_percent, old_timestamp, new_timestamp, updated_at
+                )
+                SELECT
+                    l.token_id,
+                    ?,
+                    o.price / 1000000.0,
+                    l.price / 1000000.0,
+                    CASE WHEN o.price > 0
+                         THEN (l.price - o.price) * 100.0 / o.price
+                         ELSE 0 END,
+                    o.timestamp,
+                    l.timestamp,
+                    CURRENT_TIMESTAMP
+                FROM latest l
+                JOIN old o ON o.token_id = l.token_id AND o.rn = 1
+                JOIN v_active_tokens t ON t.token_id = l.token_id
+                WHERE l.rn = 1
+                ON CONFLICT(token_id, window_minutes) DO UPDATE SET
+                    old_price = excluded.old_price,
+                    new_price = excluded.new_price,
+                    change_percent = excluded.change_percent,
+                    old_timestamp = excluded.old_timestamp,
+                    new_timestamp = excluded.new_timestamp,
+                    updated_at = excluded.updated_at
+            ''', (window_minutes * 60, window_minutes))
 
-    def get_latest_prices(self, limit: int = 100) -> List[Dict[str, Any]]:
-        """Get latest prices for all active markets"""
+    def get_latest_prices(self, limit: int = 100) -> Iterator[sqlite3.Row]:
+        """Yield the latest price row per token for all active markets.
+
+        Rows stream out in fetchmany batches instead of materializing a
+        dict per row; sqlite3.Row is already dict-like, and callers that
+        need a real dict can convert at use-site.
+        """
         with self.get_connection() as conn:
             cursor = conn.cursor()
+            # ROW_NUMBER over the covering token index
+            # picks each token's newest row in one pass, instead of the
+            # old MAX(timestamp) subquery that scanned the table twice
             cursor.execute('''
-                SELECT DISTINCT
-                    m.condition_id,
-                    m.question,
-                    t.token_id,
+                SELECT
+                    t.condition_id,
+                    t.question,
+                    l.token_id,
                     t.outcome,
-                    ph.price,
-                    ph.timestamp
-                FROM price_history ph
-                INNER JOIN tokens t ON ph.token_id = t.token_id
-                INNER JOIN markets m ON ph.condition_id = m.condition_id
-                INNER JOIN (
-                    SELECT token_id, MAX(timestamp) as max_timestamp
+                    l.price / 1000000.0 AS price,
+                    l.timestamp
+                FROM (
+                    SELECT token_id, price, timestamp,
+                           ROW_NUMBER() OVER (
+                               PARTITION BY token_id ORDER BY timestamp DESC
+                           ) AS rn
                     FROM price_history
-                    GROUP BY token_id
-                ) latest ON ph.token_id = latest.token_id AND ph.timestamp = latest.max_timestamp
-                WHERE m.active = 1 AND m.closed = 0
-                ORDER BY ph.timestamp DESC
+                ) l
+                JOIN v_active_tokens t ON t.token_id = l.token_id
+                WHERE l.rn = 1
+                ORDER BY l.timestamp DESC
                 LIMIT ?
             ''', (limit,))
 
-            return [dict(row) for row in cursor.fetchall()]
+            while batch := cursor.fetchmany(1024):
+                yield from batch
+
+    def get_price_history(self, token_id: str, hours: int = 24) -> Iterator[sqlite3.Row]:
+        """Yield price history rows for a specific token, newest first.
 
-    def get_price_history(self, token_id: str, hours: int = 24) -> List[Dict[str, Any]]:
-        """Get price history for a specific token"""
+        Streams in fetchmany batches — 24h of data no longer builds an
+        intermediate list plus a dict per row.
+        """
         with self.get_connection() as conn:
             cursor = conn.cursor()
             cursor.execute('''
                 SELECT
                     token_id,
                     condition_id,
-                    price,
+                    price / 1000000.0 AS price,
                     timestamp
                 FROM price_history
                 WHERE token_id = ?
-                    AND timestamp >= datetime('now', '-' || ? || ' hours')
+                    AND timestamp >= ?
                 ORDER BY timestamp DESC
-            ''', (token_id, hours))
+            ''', (token_id, int(time.time()) - hours * 3600))
+
+            while batch := cursor.fetchmany(1024):
+                yield from batch
+
+    def get_tokens_for_conditions(
+        self, condition_ids: List[str]
+    ) -> Dict[str, List[Dict[str, Any]]]:
+        """Get tokens for many markets in one query, grouped by condition_id.
+
+        The id list goes through a temp filter table (same pattern as
+        load_temp_token_filter), so one statement serves any list size.
+        """
+        if not condition_ids:
+            return {}
+
+        with self.get_connection() as conn:
+            cursor = conn.cursor()
+            cursor.execute('''
+                CREATE TEMP TABLE IF NOT EXISTS cond_filter (
+                    condition_id TEXT PRIMARY KEY
+                )
+            ''')
+            cursor.execute('DELETE FROM cond_filter')
+            cursor.executemany(
+                'INSERT OR IGNORE INTO cond_filter (condition_id) VALUES (?)',
+                ((condition_id,) for condition_id in condition_ids)
+            )
+
+            cursor.execute('''
+                SELECT condition_id, token_id, outcome
+                FROM tokens
+                JOIN cond_filter USING (condition_id)
+            ''')
+
+            tokens_by_condition: Dict[str, List[Dict[str, Any]]] = {}
+            for condition_id, token_id, outcome in cursor.fetchall():
+                tokens_by_condition.setdefault(condition_id, []).append({
+                    'token_id': token_id,
+                    'outcome': outcome
+                })
 
-            return [dict(row) for row in cursor.fetchall()]
+            return tokens_by_condition
 
     def get_market_by_condition_id(self, condition_id: str) -> Optional[Dict[str, Any]]:
-        """Get market details by condition ID"""
+        """Get market details by condition ID (cached until the row is upserted)"""
+        cached = self._market_cache.get(condition_id)
+        if cached is not None:
+            self._market_cache.move_to_end(condition_id)
+            return dict(cached)
+
         with self.get_connection() as conn:
             cursor = conn.cursor()
             cursor.execute('''
@@ -206,10 +711,18 @@ class Database:
             ''', (condition_id,))
 
             row = cursor.fetchone()
-            return dict(row) if row else None
 
-    def get_all_active_markets(self) -> List[Dict[str, Any]]:
-        """Get all active markets"""
+        if row is None:
+            return None
+
+        market = dict(row)
+        self._market_cache[condition_id] = market
+        if len(self._market_cache) > _MARKET_CACHE_SIZE:
+            self._market_cache.popitem(last=False)
+        return dict(market)
+
+    def get_all_active_markets(self) -> List[sqlite3.Row]:
+        """Get all active markets as dict-like rows"""
         with self.get_connection() as conn:
             cursor = conn.cursor()
             cursor.execute('''
@@ -218,28 +731,63 @@ class Database:
                 ORDER BY updated_at DESC
             ''')
 
-            return [dict(row) for row in cursor.fetchall()]
+            return cursor.fetchall()
 
-    def get_stats(self) -> Dict[str, int]:
-        """Get database statistics"""
-        with self.get_connection() as conn:
+    def get_last_prices(self) -> Dict[str, int]:
+        """Get the most recent stored price per token, in raw micro-units.
+
+        Seeds the scanner's unchanged-price skip map, so idle markets
+        stay write-free across process restarts, not just within one
+        run.
+        """
+        with self.get_readonly_connection() as conn:
             cursor = conn.cursor()
+            cursor.execute('''
+                SELECT token_id, price FROM (
+                    SELECT token_id, price,
+                           ROW_NUMBER() OVER (
+                               PARTITION BY token_id
+                               ORDER BY timestamp DESC
+                           ) AS rn
+                    FROM price_history
+                )
+                WHERE rn = 1
+            ''')
+            return dict(cursor.fetchall())
+
+    def get_active_tokens_with_market(self) -> List[tuple]:
+        """Get (condition_id, token_id, outcome) for every active-market token.
 
-            cursor.execute('SELECT COUNT(*) as count FROM markets')
-            total_markets = cursor.fetchone()['count']
+        One joined query replaces fetching active markets and then
+        their tokens in a second pass; the flat rows feed the price
+        scan directly.
+        """
+        with self.get_readonly_connection() as conn:
+            cursor = conn.cursor()
+            cursor.execute('''
+                SELECT condition_id, token_id, outcome FROM v_active_tokens
+            ''')
+            return cursor.fetchall()
 
-            cursor.execute('SELECT COUNT(*) as count FROM markets WHERE active = 1 AND closed = 0')
-            active_markets = cursor.fetchone()['count']
+    def get_stats(self) -> Dict[str, int]:
+        """Get database statistics from the trigger-maintained counters"""
+        with self.get_connection() as conn:
+            cursor = conn.cursor()
 
-            cursor.execute('SELECT COUNT(*) as count FROM tokens')
-            total_tokens = cursor.fetchone()['count']
+            cursor.execute('SELECT key, value FROM stats')
+            counters = {key: value for key, value in cursor.fetchall()}
 
-            cursor.execute('SELECT COUNT(*) as count FROM price_history')
-            total_prices = cursor.fetchone()['count']
+            # Active/closed flags flip via UPDATEs, which the row-count
+            # triggers cannot see; this stays a count over the small,
+            # indexed markets table
+            cursor.execute(
+                'SELECT COUNT(*) FROM markets WHERE active = 1 AND closed = 0'
+            )
+            active_markets = cursor.fetchone()[0]
 
             return {
-                'total_markets': total_markets,
+                'total_markets': counters.get('total_markets', 0),
                 'active_markets': active_markets,
-                'total_tokens': total_tokens,
-                'total_price_points': total_prices
+                'total_tokens': counters.get('total_tokens', 0),
+                'total_price_points': counters.get('total_prices', 0)
             }
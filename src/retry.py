@@ -0,0 +1,43 @@
+"""Retry helper for transient failures"""
+
+import functools
+import logging
+import random
+import time
+
+logger = logging.getLogger(__name__)
+
+
+def retry_transient(exceptions, attempts: int = 5,
+                    initial_wait: float = 0.05, max_wait: float = 2.0,
+                    wait_hint=None, giveup=None):
+    """Retry a callable on transient errors with exponential backoff.
+
+    The wait doubles per attempt (capped at ``max_wait``) with full
+    jitter, so concurrent workers hitting the same contention do not
+    retry in lockstep. ``wait_hint`` may inspect the exception and
+    return a server-suggested wait in seconds (e.g. a Retry-After
+    header), which then overrides the backoff for that attempt.
+    ``giveup`` may inspect the exception and return True for failures
+    that retrying cannot fix (e.g. a 4xx response), which re-raises
+    immediately. The last failure is re-raised.
+    """
+    def decorator(func):
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            wait = initial_wait
+            for attempt in range(1, attempts + 1):
+                try:
+                    return func(*args, **kwargs)
+                except exceptions as e:
+                    if attempt == attempts or (giveup is not None and giveup(e)):
+                        raise
+                    logger.debug(
+                        "Retrying %s after %s (attempt %d/%d)",
+                        func.__name__, e, attempt, attempts
+                    )
+                    hint = wait_hint(e) if wait_hint is not None else None
+                    time.sleep(hint if hint is not None else random.uniform(0, wait))
+                    wait = min(wait * 2, max_wait)
+        return wrapper
+    return decorator
@@ -1,13 +1,185 @@
 """Market scanner for fetching data from Polymarket API"""
 
+import atexit
+import base64
+import logging
+import threading
 import time
-from datetime import datetime
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from logging.handlers import QueueHandler, QueueListener
+from queue import Queue, SimpleQueue
 from typing import List, Dict, Any, Optional
+
+import requests
 from py_clob_client.client import ClobClient
-from py_clob_client.clob_types import ApiCreds
+from py_clob_client.clob_types import ApiCreds, BookParams
+from py_clob_client.exceptions import PolyApiException
 
 from .config import Config
-from .database import Database
+from .database import Database, PRICE_SCALE
+from .retry import retry_transient
+
+# Concurrent price fetches; the work is network-bound so threads mostly
+# sit in HTTP waits
+PRICE_FETCH_WORKERS = 32
+
+# Tokens per call to the CLOB batch price endpoints
+PRICE_BATCH_SIZE = 100
+
+# Predicted market pages fetched in parallel per round
+PAGE_FANOUT = 8
+
+# Cursor the CLOB API returns on the final page (base64 for "-1")
+_END_CURSOR = 'LTE='
+
+# Errors worth retrying on any API call: network hiccups and CLOB-side
+# failures (throttling, gateway errors)
+_TRANSIENT_API_ERRORS = (requests.RequestException, PolyApiException)
+
+
+def _status_of(exc) -> Optional[int]:
+    """Pull the HTTP status code off an API exception, if it has one"""
+    status = getattr(exc, 'status_code', None)
+    if status is None:
+        response = getattr(exc, 'response', None)
+        if response is not None:
+            status = getattr(response, 'status_code', None)
+    return status
+
+
+def _retry_after_hint(exc) -> Optional[float]:
+    """Extract a server-suggested wait from a 429 response, if any"""
+    if _status_of(exc) != 429:
+        return None
+
+    response = getattr(exc, 'response', None)
+    headers = getattr(response, 'headers', None) or {}
+    try:
+        return float(headers.get('Retry-After'))
+    except (TypeError, ValueError):
+        return 1.0
+
+
+def _permanent_api_error(exc) -> bool:
+    """True for failures retrying cannot fix: 4xx responses except 429"""
+    status = _status_of(exc)
+    return status is not None and 400 <= status < 500 and status != 429
+
+logger = logging.getLogger(__name__)
+
+_log_listener = None
+
+
+def setup_logging(level: int = logging.INFO):
+    """Configure queue-based logging for scanner output.
+
+    Records go to a queue drained by a background QueueListener, so a
+    log call inside the fetch thread pool is just a queue append rather
+    than a blocking stdout write that would serialize the workers.
+    """
+    global _log_listener
+    if _log_listener is not None:
+        return
+
+    queue = SimpleQueue()
+    stream = logging.StreamHandler()
+    stream.setFormatter(logging.Formatter('%(message)s'))
+
+    root = logging.getLogger()
+    root.setLevel(level)
+    root.addHandler(QueueHandler(queue))
+
+    _log_listener = QueueListener(queue, stream)
+    _log_listener.start()
+    atexit.register(_log_listener.stop)
+
+
+class _TTLCache:
+    """Small thread-safe TTL cache with LRU eviction"""
+
+    def __init__(self, maxsize: int, ttl: float):
+        self._maxsize = maxsize
+        self._ttl = ttl
+        self._lock = threading.Lock()
+        self._items: OrderedDict = OrderedDict()
+
+    def get(self, key):
+        with self._lock:
+            item = self._items.get(key)
+            if item is None:
+                return None
+            expires_at, value = item
+            if expires_at < time.monotonic():
+                del self._items[key]
+                return None
+            self._items.move_to_end(key)
+            return value
+
+    def put(self, key, value):
+        with self._lock:
+            self._items[key] = (time.monotonic() + self._ttl, value)
+            self._items.move_to_end(key)
+            while len(self._items) > self._maxsize:
+                self._items.popitem(last=False)
+
+
+class _RateLimiter:
+    """Thread-safe limiter allowing at most ``rate`` acquisitions per second.
+
+    Threads reserve evenly spaced slots under a lock and sleep outside
+    it, so the request rate stays steady no matter how many workers are
+    in flight.
+    """
+
+    def __init__(self, rate: float):
+        self._interval = 1.0 / rate
+        self._lock = threading.Lock()
+        self._next_at = 0.0
+
+    def acquire(self):
+        with self._lock:
+            now = time.monotonic()
+            wait = self._next_at - now
+            self._next_at = max(self._next_at, now) + self._interval
+        if wait > 0:
+            time.sleep(wait)
+
+
+_shared_session_installed = False
+
+
+def _install_shared_session() -> None:
+    """Route py_clob_client's HTTP through one keep-alive Session.
+
+    The client issues calls through requests' module-level functions,
+    which open and tear down a TCP+TLS connection per request. A
+    Session exposes the same get/post/request surface, so dropping one
+    in as the helper module's ``requests`` makes every call reuse warm
+    pooled connections instead — the handshake is paid once per worker,
+    not once per request.
+    """
+    global _shared_session_installed
+    if _shared_session_installed:
+        return
+
+    try:
+        from py_clob_client.http_helpers import helpers
+    except ImportError:
+        # Client layout changed; keep-alive is an optimization, not a
+        # requirement
+        _shared_session_installed = True
+        return
+
+    session = requests.Session()
+    adapter = requests.adapters.HTTPAdapter(
+        pool_connections=PRICE_FETCH_WORKERS,
+        pool_maxsize=PRICE_FETCH_WORKERS,
+    )
+    session.mount('https://', adapter)
+    session.mount('http://', adapter)
+    helpers.requests = session
+    _shared_session_installed = True
 
 
 class PolymarketScanner:
@@ -15,172 +187,566 @@ class PolymarketScanner:
 
     def __init__(self, db: Optional[Database] = None):
         self.db = db or Database()
+        _install_shared_session()
         self.client = ClobClient(
             host=Config.CLOB_API_URL,
             chain_id=Config.CHAIN_ID
         )
+        # One limiter shared by every API path (pages and prices), so
+        # total request rate stays at Config.API_QPS no matter how many
+        # threads are in flight
+        self._limiter = _RateLimiter(rate=Config.API_QPS)
+        # Last stored price per token in micro-units; unchanged prices
+        # are skipped instead of re-inserted every scan. Seeded from the
+        # database so the skip also covers the first scan after a
+        # restart
+        self._last_price: Dict[str, int] = self.db.get_last_prices()
+        # Market pages rarely change between scheduled runs; cache them
+        # by cursor so steady-state scans reuse the unchanged prefix
+        self._page_cache = _TTLCache(
+            maxsize=2048, ttl=Config.SCAN_INTERVAL_SECONDS * 4
+        )
+
+    @retry_transient(_TRANSIENT_API_ERRORS, initial_wait=0.5, max_wait=30.0,
+                     wait_hint=_retry_after_hint,
+                     giveup=_permanent_api_error)
+    def _fetch_markets_page(self, next_cursor: Optional[str]) -> Dict[str, Any]:
+        """Fetch one page of markets, pacing requests and caching by cursor"""
+        cached = self._page_cache.get(next_cursor)
+        if cached is not None:
+            return cached
+
+        self._limiter.acquire()
+        if next_cursor is None:
+            response = self.client.get_markets()
+        else:
+            response = self.client.get_markets(next_cursor=next_cursor)
+
+        self._page_cache.put(next_cursor, response)
+        return response
+
+    @staticmethod
+    def _decode_cursor(cursor: str) -> Optional[int]:
+        """Decode a CLOB pagination cursor to its integer offset, or None"""
+        try:
+            return int(base64.b64decode(cursor).decode())
+        except Exception:
+            return None
+
+    @staticmethod
+    def _encode_cursor(offset: int) -> str:
+        """Encode an integer offset back into a CLOB pagination cursor"""
+        return base64.b64encode(str(offset).encode()).decode()
 
     def fetch_all_markets(self) -> List[Dict[str, Any]]:
         """Fetch all markets from Polymarket API with pagination"""
-        print("Fetching markets from Polymarket...")
+        markets_list: List[Dict[str, Any]] = []
+        self._produce_markets(markets_list.extend)
+        return markets_list
 
-        markets_list = []
-        next_cursor = None
-        page = 1
+    def _produce_markets(self, emit) -> None:
+        """Fetch every market page, handing each page's markets to ``emit``.
+
+        CLOB cursors are base64-encoded integer offsets, so once the
+        first page reveals the page size the following cursors can be
+        predicted and fetched PAGE_FANOUT at a time in parallel. If a
+        cursor ever fails to decode, fetching falls back to the serial
+        one-page-ahead walk. Speculative pages can overlap near the end
+        of the listing, so markets are deduplicated by condition_id
+        before reaching ``emit``.
+        """
+        logger.info("Fetching markets from Polymarket...")
+
+        seen_ids = set()
+        total = 0
+
+        def collect(page_data):
+            nonlocal total
+            fresh = []
+            for market in page_data:
+                condition_id = market.get('condition_id')
+                if condition_id in seen_ids:
+                    continue
+                seen_ids.add(condition_id)
+                fresh.append(market)
+            if fresh:
+                total += len(fresh)
+                emit(fresh)
 
         try:
-            while True:
-                if next_cursor is None:
-                    response = self.client.get_markets()
+            response = self._fetch_markets_page(None)
+            data = response.get('data') or []
+            collect(data)
+
+            next_cursor = response.get('next_cursor')
+            if data and next_cursor and next_cursor != _END_CURSOR:
+                offset = self._decode_cursor(next_cursor)
+                if offset is not None:
+                    self._fetch_pages_fanout(offset, len(data), collect)
                 else:
-                    response = self.client.get_markets(next_cursor=next_cursor)
+                    self._fetch_pages_serial(next_cursor, collect)
 
-                if 'data' not in response or not response['data']:
-                    break
+        except Exception as e:
+            logger.error("Error fetching markets: %s", e)
 
-                markets_list.extend(response['data'])
-                print(f"  Fetched page {page}: {len(response['data'])} markets (total: {len(markets_list)})")
+        logger.info("✓ Fetched %d total markets", total)
 
-                next_cursor = response.get('next_cursor')
+    def _fetch_pages_fanout(self, offset: int, page_size: int, collect):
+        """Fetch predicted cursors PAGE_FANOUT at a time until the end"""
+        with ThreadPoolExecutor(max_workers=PAGE_FANOUT) as executor:
+            while True:
+                cursors = [
+                    self._encode_cursor(offset + i * page_size)
+                    for i in range(PAGE_FANOUT)
+                ]
+
+                futures = [
+                    executor.submit(self._fetch_markets_page, cursor)
+                    for cursor in cursors
+                ]
+
+                done = False
+                any_data = False
+                for cursor, future in zip(cursors, futures):
+                    try:
+                        response = future.result()
+                    except Exception as e:
+                        # Retries exhausted for this page; skip it and
+                        # keep going — predicted cursors mean the rest
+                        # of the round does not depend on it
+                        logger.error("Error fetching markets page %s: %s", cursor, e)
+                        continue
+
+                    data = response.get('data') or []
+                    if not data:
+                        done = True
+                        continue
+                    any_data = True
+                    collect(data)
+                    next_cursor = response.get('next_cursor')
+                    if not next_cursor or next_cursor == _END_CURSOR:
+                        done = True
+
+                if done:
+                    return
+                if not any_data:
+                    # Every page in the round failed even after retries;
+                    # the endpoint is unhealthy, so stop here instead of
+                    # probing later offsets forever
+                    logger.error(
+                        "No market pages fetched at offset %d; aborting pagination",
+                        offset
+                    )
+                    return
+
+                offset += PAGE_FANOUT * page_size
+                logger.debug("  Fetched markets through offset %d", offset)
+
+    def _fetch_pages_serial(self, next_cursor: str, collect):
+        """Walk opaque cursors one page at a time with one-page-ahead prefetch"""
+        with ThreadPoolExecutor(max_workers=1) as executor:
+            future = executor.submit(self._fetch_markets_page, next_cursor)
+            page = 2
 
-                if not next_cursor:
+            while True:
+                response = future.result()
+                data = response.get('data') or []
+                if not data:
                     break
 
-                page += 1
-                time.sleep(0.1)  # Rate limiting
+                next_cursor = response.get('next_cursor')
+                if next_cursor and next_cursor != _END_CURSOR:
+                    # Prefetch the next page before touching this one
+                    future = executor.submit(self._fetch_markets_page, next_cursor)
 
-        except Exception as e:
-            print(f"Error fetching markets: {e}")
+                collect(data)
+                logger.debug("  Fetched page %d: %d markets", page, len(data))
 
-        print(f"✓ Fetched {len(markets_list)} total markets")
-        return markets_list
+                if not next_cursor or next_cursor == _END_CURSOR:
+                    break
+
+                page += 1
 
     def fetch_simplified_markets(self) -> List[Dict[str, Any]]:
         """Fetch simplified market data (faster, less detailed)"""
         try:
-            response = self.client.get_simplified_markets()
-            return response.get('data', [])
+            markets = []
+            next_cursor = None
+            while True:
+                self._limiter.acquire()
+                if next_cursor is None:
+                    response = self.client.get_simplified_markets()
+                else:
+                    response = self.client.get_simplified_markets(
+                        next_cursor=next_cursor
+                    )
+                markets.extend(response.get('data') or [])
+                next_cursor = response.get('next_cursor')
+                if not next_cursor or next_cursor == _END_CURSOR:
+                    break
+            return markets
         except Exception as e:
-            print(f"Error fetching simplified markets: {e}")
+            logger.error("Error fetching simplified markets: %s", e)
             return []
 
+    @retry_transient(_TRANSIENT_API_ERRORS, wait_hint=_retry_after_hint,
+                     giveup=_permanent_api_error)
+    def _fetch_market_detail(self, condition_id: str) -> Dict[str, Any]:
+        """Fetch one market's full JSON, retried with backoff"""
+        self._limiter.acquire()
+        return self.client.get_market(condition_id)
+
+    @retry_transient(_TRANSIENT_API_ERRORS, wait_hint=_retry_after_hint,
+                     giveup=_permanent_api_error)
+    def _fetch_token_prices(self, token_id: str) -> Dict[str, Any]:
+        """Fetch one token's prices; network hiccups are retried with backoff.
+
+        One order-book request carries both sides, so the midpoint and
+        best buy/sell prices come out of a single round trip instead of
+        separate midpoint and per-side price calls.
+        """
+        self._limiter.acquire()
+        book = self.client.get_order_book(token_id)
+
+        # The client may return the book as a dict or a summary object
+        bids = getattr(book, 'bids', None)
+        asks = getattr(book, 'asks', None)
+        if bids is None and isinstance(book, dict):
+            bids = book.get('bids')
+            asks = book.get('asks')
+
+        def level_price(level):
+            price = level.get('price') if isinstance(level, dict) else level.price
+            return float(price)
+
+        best_bid = max(map(level_price, bids)) if bids else None
+        best_ask = min(map(level_price, asks)) if asks else None
+
+        if best_bid is not None and best_ask is not None:
+            midpoint = (best_bid + best_ask) / 2
+        else:
+            midpoint = best_ask if best_bid is None else best_bid
+
+        return {
+            'token_id': token_id,
+            'midpoint': midpoint,
+            'buy_price': best_ask,   # Buying fills against the best ask
+            'sell_price': best_bid,  # Selling fills against the best bid
+            'timestamp': int(time.time())
+        }
+
     def fetch_market_prices(self, token_id: str) -> Optional[Dict[str, Any]]:
         """Fetch current price data for a specific token"""
         try:
-            # Get midpoint price
-            midpoint = self.client.get_midpoint(token_id)
+            return self._fetch_token_prices(token_id)
+        except Exception as e:
+            # Token might not have prices yet or be inactive
+            return None
+
+    @retry_transient(_TRANSIENT_API_ERRORS, wait_hint=_retry_after_hint,
+                     giveup=_permanent_api_error)
+    def _fetch_batch_responses(self, token_ids: List[str]) -> tuple:
+        """Issue the three batch price requests, retried with backoff"""
+        self._limiter.acquire()
+        midpoints = self.client.get_midpoints(
+            params=[BookParams(token_id=t) for t in token_ids]
+        )
+
+        self._limiter.acquire()
+        buy_prices = self.client.get_prices(
+            params=[BookParams(token_id=t, side="BUY") for t in token_ids]
+        )
+
+        self._limiter.acquire()
+        sell_prices = self.client.get_prices(
+            params=[BookParams(token_id=t, side="SELL") for t in token_ids]
+        )
+
+        return midpoints, buy_prices, sell_prices
 
-            # Get buy/sell prices
-            buy_price = self.client.get_price(token_id, side="BUY")
-            sell_price = self.client.get_price(token_id, side="SELL")
+    def fetch_prices_batch(self, token_ids: List[str]) -> Dict[str, Dict[str, Any]]:
+        """Fetch price data for many tokens via the CLOB batch endpoints.
 
-            return {
+        Three requests cover the whole batch (midpoints plus BUY and
+        SELL prices) instead of three round-trips per token. Returns a
+        dict keyed by token_id in the same shape as fetch_market_prices.
+        """
+        try:
+            midpoints, buy_prices, sell_prices = self._fetch_batch_responses(token_ids)
+        except Exception as e:
+            logger.error("Error fetching price batch: %s", e)
+            return {}
+
+        timestamp = int(time.time())
+        results = {}
+
+        for token_id in token_ids:
+            midpoint = midpoints.get(token_id)
+            buy = buy_prices.get(token_id)
+            sell = sell_prices.get(token_id)
+            if isinstance(buy, dict):
+                buy = buy.get('BUY')
+            if isinstance(sell, dict):
+                sell = sell.get('SELL')
+
+            results[token_id] = {
                 'token_id': token_id,
                 'midpoint': float(midpoint) if midpoint else None,
-                'buy_price': float(buy_price) if buy_price else None,
-                'sell_price': float(sell_price) if sell_price else None,
-                'timestamp': datetime.utcnow().isoformat()
+                'buy_price': float(buy) if buy else None,
+                'sell_price': float(sell) if sell else None,
+                'timestamp': timestamp
             }
-        except Exception as e:
-            # Token might not have prices yet or be inactive
-            return None
+
+        return results
 
     def scan_and_store_markets(self) -> int:
-        """Scan markets and store in database"""
-        markets = self.fetch_all_markets()
-        stored_count = 0
+        """Scan markets and store in database.
 
-        print("Storing markets in database...")
+        Pages flow through a bounded queue from a producer thread into
+        the DB writer, so storage overlaps fetching and memory stays
+        proportional to the queue depth rather than the whole universe.
+        """
+        queue: Queue = Queue(maxsize=64)
 
-        for market in markets:
+        def produce():
             try:
-                # Store market
-                self.db.upsert_market(market)
-
-                # Store tokens (YES/NO outcomes)
-                if 'tokens' in market and isinstance(market['tokens'], list):
-                    for token in market['tokens']:
-                        self.db.upsert_token(
-                            token_id=token['token_id'],
-                            condition_id=market['condition_id'],
-                            outcome=token.get('outcome', 'UNKNOWN')
-                        )
+                self._produce_markets(queue.put)
+            finally:
+                queue.put(None)  # Sentinel: no more pages
 
-                stored_count += 1
+        producer = threading.Thread(target=produce, daemon=True)
+        producer.start()
 
-            except Exception as e:
-                print(f"Error storing market {market.get('condition_id', 'unknown')}: {e}")
+        token_rows = []
+
+        # Bind hot callables once; attribute lookups add up across the
+        # whole universe
+        market_row = self.db.market_row
 
-        print(f"✓ Stored {stored_count} markets")
+        def row_batches():
+            while (page := queue.get()) is not None:
+                rows = []
+                for market in page:
+                    try:
+                        rows.append(market_row(market))
+                    except Exception as e:
+                        logger.error("Error storing market %s: %s",
+                                     market.get('condition_id', 'unknown'), e)
+                        continue
+
+                    # Collect tokens (YES/NO outcomes) for one bulk insert
+                    token_rows.extend(
+                        (token['token_id'], market['condition_id'],
+                         token.get('outcome', 'UNKNOWN'))
+                        for token in market.get('tokens') or ()
+                    )
+                if rows:
+                    yield rows
+
+        logger.info("Storing markets in database...")
+        stored_count = self.db.ingest_market_batches(row_batches())
+        self.db.upsert_tokens_bulk(token_rows)
+        producer.join()
+
+        logger.info("✓ Stored %d markets", stored_count)
         return stored_count
 
+    def scan_and_store_active_markets(self) -> int:
+        """Refresh the active universe from the simplified listing.
+
+        The simplified endpoint pages through the same universe as the
+        full one in a reduced schema that still carries each market's
+        own active/closed flags. A steady-state scan therefore only
+        needs full market JSON for condition ids it has never stored;
+        everything else is already in the markets table and just has
+        its active/closed flags reconciled. Falls back to a full
+        paginated scan when the database is empty or the listing is
+        unavailable.
+        """
+        known = self.db.get_known_condition_ids()
+        if not known:
+            return self.scan_and_store_markets()
+
+        simplified = self.fetch_simplified_markets()
+        if not simplified:
+            logger.warning("Simplified listing unavailable; running full market scan")
+            return self.scan_and_store_markets()
+
+        # The listing includes closed markets too; only entries flagged
+        # active may end up in the reconciled active set
+        active_ids = [
+            market['condition_id'] for market in simplified
+            if market.get('condition_id')
+            and market.get('active', 1) and not market.get('closed', 0)
+        ]
+        missing = [
+            condition_id for condition_id in active_ids
+            if condition_id not in known
+        ]
+
+        def fetch_one(condition_id):
+            try:
+                return self._fetch_market_detail(condition_id)
+            except Exception as e:
+                logger.error("Error fetching market %s: %s", condition_id, e)
+                return None
+
+        market_rows = []
+        token_rows = []
+        if missing:
+            logger.info("Fetching %d new markets...", len(missing))
+            market_row = self.db.market_row
+            with ThreadPoolExecutor(max_workers=PRICE_FETCH_WORKERS) as executor:
+                for market in executor.map(fetch_one, missing):
+                    if not market:
+                        continue
+                    try:
+                        market_rows.append(market_row(market))
+                    except Exception as e:
+                        logger.error("Error storing market %s: %s",
+                                     market.get('condition_id', 'unknown'), e)
+                        continue
+                    token_rows.extend(
+                        (token['token_id'], market['condition_id'],
+                         token.get('outcome', 'UNKNOWN'))
+                        for token in market.get('tokens') or ()
+                    )
+
+        self.db.bulk_ingest_markets(market_rows)
+
+        # The simplified listing carries token ids and outcomes too;
+        # upserting them (for the active set) keeps the tokens table
+        # fresh for free
+        active_id_set = set(active_ids)
+        token_rows.extend(
+            (token['token_id'], market['condition_id'],
+             token.get('outcome', 'UNKNOWN'))
+            for market in simplified
+            if market.get('condition_id') in active_id_set
+            for token in market.get('tokens') or ()
+            if token.get('token_id')
+        )
+        self.db.upsert_tokens_bulk(token_rows)
+
+        self.db.sync_active_flags(active_ids)
+
+        logger.info("✓ Refreshed %d active markets (%d new)",
+                    len(active_ids), len(market_rows))
+        return len(active_ids)
+
     def scan_and_store_prices(self, active_only: bool = True) -> int:
         """Scan current prices and store in database"""
-        print("Fetching current prices...")
+        logger.info("Fetching current prices...")
 
-        markets = self.db.get_all_active_markets() if active_only else []
+        # One joined query yields every active-market token, already
+        # flat — no per-market second pass
+        token_rows = self.db.get_active_tokens_with_market() if active_only else []
 
-        if not markets:
-            print("No active markets found. Run scan_and_store_markets() first.")
+        if not token_rows:
+            logger.warning("No active markets found. Run scan_and_store_markets() first.")
             return 0
 
         stored_count = 0
         errors = 0
 
-        for market in markets:
-            condition_id = market['condition_id']
-
-            # Get tokens for this market
-            with self.db.get_connection() as conn:
-                cursor = conn.cursor()
-                cursor.execute(
-                    'SELECT token_id, outcome FROM tokens WHERE condition_id = ?',
-                    (condition_id,)
-                )
-                tokens = [dict(row) for row in cursor.fetchall()]
-
-            # Fetch and store price for each token
-            for token in tokens:
-                token_id = token['token_id']
-                price_data = self.fetch_market_prices(token_id)
-
-                if price_data and price_data['midpoint'] is not None:
-                    try:
-                        self.db.insert_price(
-                            token_id=token_id,
-                            condition_id=condition_id,
-                            price=price_data['midpoint'],
-                            timestamp=price_data['timestamp']
+        token_jobs = [
+            (token_id, condition_id)
+            for condition_id, token_id, _ in token_rows
+        ]
+
+        # Fetch prices through the batch endpoints, 100 tokens per call,
+        # with batches running concurrently; the shared limiter keeps the
+        # overall request rate in check. Batches come from the deduped
+        # mapping so a token is fetched (and written) at most once even
+        # if it appears under several rows
+        condition_by_token = dict(token_jobs)
+        token_ids = list(condition_by_token)
+        batches = [
+            token_ids[i:i + PRICE_BATCH_SIZE]
+            for i in range(0, len(token_ids), PRICE_BATCH_SIZE)
+        ]
+
+        # Progress is reported at most every couple of seconds rather
+        # than per batch, so the hot loop is not serialized on output
+        total = len(token_ids)
+        done = 0
+        last_report = time.monotonic()
+
+        # Keyed by token_id, so retried or overlapping batches can never
+        # produce two rows for the same token in one scan
+        price_rows: Dict[str, tuple] = {}
+        with ThreadPoolExecutor(max_workers=PRICE_FETCH_WORKERS) as executor:
+            for batch, batch_result in zip(
+                batches, executor.map(self.fetch_prices_batch, batches)
+            ):
+                done += len(batch)
+                now = time.monotonic()
+                if now - last_report >= 2.0:
+                    logger.info("  Fetched prices for %d/%d tokens...", done, total)
+                    last_report = now
+
+                for token_id, price_data in batch_result.items():
+                    midpoint = price_data['midpoint']
+                    if midpoint is not None:
+                        # Coerce to micro-units here, once; the filter
+                        # below and the bulk insert both consume the
+                        # integer as-is
+                        price_rows[token_id] = (
+                            token_id,
+                            condition_by_token[token_id],
+                            int(round(midpoint * PRICE_SCALE)),
+                            price_data['timestamp']
                         )
-                        stored_count += 1
-                    except Exception as e:
-                        errors += 1
 
-                # Rate limiting
-                time.sleep(0.05)
+        # Most markets do not move between scans; dropping rows whose
+        # price matches the last stored value keeps price_history to
+        # actual changes
+        changed_rows = []
+        last_price = self._last_price
+        for row in price_rows.values():
+            token_id, _, units, _ = row
+            if last_price.get(token_id) != units:
+                changed_rows.append(row)
 
-        print(f"✓ Stored {stored_count} price points ({errors} errors)")
+        try:
+            stored_count = self.db.insert_prices_bulk(changed_rows)
+        except Exception as e:
+            errors = len(changed_rows)
+            logger.error("Error storing prices: %s", e)
+        else:
+            # Remember only prices that actually reached the database;
+            # updating the map before a failed insert would make every
+            # later scan skip rows that were never written
+            for token_id, _, units, _ in changed_rows:
+                last_price[token_id] = units
+
+        logger.info("✓ Stored %d price points (%d errors)", stored_count, errors)
         return stored_count
 
     def full_scan(self) -> Dict[str, int]:
         """Perform a full scan: fetch markets and prices"""
-        print("\n" + "="*60)
-        print("Starting full Polymarket scan...")
-        print("="*60 + "\n")
+        logger.info("=" * 60)
+        logger.info("Starting full Polymarket scan...")
+        logger.info("=" * 60)
 
         start_time = time.time()
 
-        # Scan markets
-        markets_count = self.scan_and_store_markets()
+        # Scan markets (incremental once the database is seeded)
+        markets_count = self.scan_and_store_active_markets()
 
         # Scan prices
         prices_count = self.scan_and_store_prices()
 
+        # Refresh the pre-aggregated change cache for tracked windows
+        logger.info("Refreshing change cache...")
+        for window in Config.TRACKED_WINDOWS:
+            self.db.refresh_change_cache(window)
+
         elapsed = time.time() - start_time
 
-        print(f"\n✓ Scan completed in {elapsed:.2f} seconds")
-        print(f"  Markets: {markets_count}")
-        print(f"  Prices: {prices_count}")
+        logger.info("✓ Scan completed in %.2f seconds", elapsed)
+        logger.info("  Markets: %d", markets_count)
+        logger.info("  Prices: %d", prices_count)
 
         return {
             'markets': markets_count,
@@ -1,11 +1,11 @@
 """Scheduler for automated market scanning"""
 
-import time
-import schedule
+import asyncio
+import signal
 from datetime import datetime
 from typing import Optional
 
-from .scanner import PolymarketScanner
+from .scanner import PolymarketScanner, setup_logging
 from .database import Database
 from .config import Config
 
@@ -33,10 +33,42 @@ class ScanScheduler:
         except Exception as e:
             print(f"\n✗ Scheduled scan failed: {e}")
 
+    async def _run(self, interval: int):
+        """Scan, then sleep out the interval, until stopped.
+
+        The process sleeps the whole interval in one asyncio.sleep
+        instead of waking every second to poll a schedule table. The
+        scan itself is synchronous, so it runs in a worker thread via
+        asyncio.to_thread and the loop stays free to react to signals
+        mid-scan.
+        """
+        loop = asyncio.get_running_loop()
+        task = asyncio.current_task()
+        for sig in (signal.SIGINT, signal.SIGTERM):
+            try:
+                loop.add_signal_handler(sig, task.cancel)
+            except NotImplementedError:
+                # Not available on this platform; KeyboardInterrupt in
+                # start() still covers Ctrl+C
+                pass
+
+        try:
+            while self.running:
+                await asyncio.to_thread(self.scan_job)
+                if not self.running:
+                    break
+                await asyncio.sleep(interval)
+        except asyncio.CancelledError:
+            print("\n\nStopping scheduler...")
+        finally:
+            self.running = False
+
     def start(self, interval_seconds: Optional[int] = None):
         """Start the scheduler"""
         interval = interval_seconds or Config.SCAN_INTERVAL_SECONDS
 
+        setup_logging()
+
         print("\n" + "="*60)
         print("Polymarket Scanner - Continuous Mode")
         print("="*60)
@@ -44,26 +76,13 @@ class ScanScheduler:
         print(f"Database: {Config.get_db_path()}")
         print("\nPress Ctrl+C to stop\n")
 
-        # Schedule the job
-        schedule.every(interval).seconds.do(self.scan_job)
-
-        # Run initial scan immediately
-        self.scan_job()
-
-        # Start the scheduler loop
         self.running = True
-        print("\n" + "-"*60)
-        print("Scheduler started. Waiting for next scan...")
-        print("-"*60 + "\n")
-
         try:
-            while self.running:
-                schedule.run_pending()
-                time.sleep(1)
+            asyncio.run(self._run(interval))
         except KeyboardInterrupt:
             print("\n\nStopping scheduler...")
             self.running = False
 
     def stop(self):
-        """Stop the scheduler"""
+        """Stop the scheduler after the current cycle"""
         self.running = False